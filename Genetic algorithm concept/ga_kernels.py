@@ -0,0 +1,146 @@
+"""
+Numba kernels for the genetic route generator.
+
+Importing this module JIT-compiles the kernels on first call (cached on
+disk afterwards). Running `python ga_kernels.py` builds the same kernels
+ahead of time into the `ga_kernels_aot` extension, which route_generator
+prefers when it is importable. The AOT fitness kernel runs serially, since
+pycc has no parallel target.
+"""
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def _xorshift(rng_state):
+    """Advance a xorshift64 state in place and return the new value."""
+    x = rng_state[0]
+    x ^= x << np.uint64(13)
+    x ^= x >> np.uint64(7)
+    x ^= x << np.uint64(17)
+    rng_state[0] = x
+    return x
+
+
+@njit(cache=True)
+def _randbelow(rng_state, n):
+    return np.int64(_xorshift(rng_state) % np.uint64(n))
+
+
+@njit(cache=True, fastmath=True)
+def random_walk(hold_y, neighbor_ptr, neighbor_idx, visited, start, num_moves, out, rng_state):
+    """Fill `out` with a random upward walk from `start`, returns its length."""
+    candidates = np.empty(hold_y.shape[0], dtype=np.int32)
+    out[0] = start
+    visited[start] = 1
+    current = start
+    length = 1
+
+    for _ in range(num_moves):
+        # Find holds above among the current hold's neighbors
+        n_candidates = 0
+        for k in range(neighbor_ptr[current], neighbor_ptr[current + 1]):
+            i = neighbor_idx[k]
+            if visited[i]:
+                continue
+
+            # Must be upward or slightly lateral
+            if hold_y[i] - hold_y[current] < -0.05:
+                continue
+
+            candidates[n_candidates] = i
+            n_candidates += 1
+
+        if n_candidates == 0:
+            break
+
+        current = candidates[_randbelow(rng_state, n_candidates)]
+        visited[current] = 1
+        out[length] = current
+        length += 1
+
+    return length
+
+
+@njit(cache=True)
+def crossover_kernel(parent1, parent2, point, child, in_child):
+    """Write parent1[:point] + unseen parent2 holds into `child`, returns its length."""
+    limit = max(parent1.shape[0], parent2.shape[0])
+    for k in range(point):
+        child[k] = parent1[k]
+        in_child[parent1[k]] = 1
+    length = point
+
+    # Add holds from parent2 that aren't already in child
+    for hold in parent2:
+        if length >= limit:
+            break
+        if not in_child[hold]:
+            child[length] = hold
+            in_child[hold] = 1
+            length += 1
+
+    # Keep the row's -1 padding and leave the scratch mask clean for the next child
+    child[length:] = -1
+    for k in range(length):
+        in_child[child[k]] = 0
+    return length
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def fitness_batch(population, lengths, hold_y, hold_size, D, target_dist,
+                   size_coef, size_bias, long_bonus, target_length, out):
+    """Score every row of a -1 padded population matrix into `out`."""
+    for p in prange(population.shape[0]):
+        route = population[p]
+        n = lengths[p]
+        if n < 3:
+            out[p] = -1000
+            continue
+
+        # 1. Upward progression
+        score = (hold_y[route[n - 1]] - hold_y[route[0]]) * 100.0
+
+        # Single pass over the moves for distances, sizes and backtracking
+        dist_sq_err = 0.0
+        size_sum = float(hold_size[route[0]])
+        y_decreases = 0
+        long_moves = 0
+        for k in range(1, n):
+            dy = hold_y[route[k]] - hold_y[route[k - 1]]
+            dist = D[route[k - 1], route[k]]
+            dist_sq_err += (dist - target_dist)**2
+            size_sum += hold_size[route[k]]
+            if dy < 0:
+                y_decreases += 1
+            if dist > 0.15:
+                long_moves += 1
+
+        # 2. Consistent move distances
+        score -= dist_sq_err / (n - 1) * 500  # Penalize inconsistency
+
+        # 3. Style matching - hold sizes
+        score += size_coef * (size_sum / n) + size_bias
+
+        # 4. Route length matching difficulty
+        score -= abs(n - target_length) * 10
+
+        # 5. No backtracking
+        score -= y_decreases * 20
+
+        # 6. Dynamic movement bonus
+        score += long_bonus * long_moves
+
+        out[p] = score
+
+
+if __name__ == "__main__":
+    # pycc is only needed for this build step, so importing the kernels
+    # never touches it
+    from numba.pycc import CC
+
+    cc = CC("ga_kernels_aot")
+    cc.export("random_walk", "i8(f4[:], i4[:], i4[:], u1[:], i8, i8, i4[:], u8[:])")(random_walk)
+    cc.export("crossover_kernel", "i8(i4[:], i4[:], i8, i4[:], u1[:])")(crossover_kernel)
+    cc.export("fitness_batch", "void(i4[:, :], i4[:], f4[:], f4[:], f4[:, :], f8, f8, f8, f8, f8, f8[:])")(fitness_batch)
+    cc.compile()
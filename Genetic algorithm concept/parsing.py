@@ -1,4 +1,6 @@
 import re
+from collections import namedtuple
+from functools import lru_cache
 
 V_SCALE = {
     "V0": 0.05, "V1": 0.10, "V2": 0.15,
@@ -21,8 +23,25 @@ FB_SCALE = {
     "8C": 1.00
 }
 
+# One lookup table for both scales
+GRADE_SCALE = {**V_SCALE, **FB_SCALE}
 
-def parse_style(style_input: str):
+_V_RE = re.compile(r"V(\d+)[+-]?$")
+_RANGE_RE = re.compile(r"(.+)[\-\u2013](.+)")
+
+
+def _normalize_grade(grade: str) -> str:
+    """'V04' / 'V4+' / 'V4-' -> 'V4', anything else unchanged."""
+    v_match = _V_RE.match(grade)
+    return "V" + str(int(v_match.group(1))) if v_match else grade
+
+# Immutable (and hashable) so a parsed style can be cached and shared
+StyleParams = namedtuple("StyleParams", "hold_size_preference avg_move_distance compression_level "
+                                        "crimpy_level footwork_technicality dynamic_level")
+
+
+@lru_cache(maxsize=128)
+def parse_style(style_input: str) -> StyleParams:
     """
     Convert user style text ('crimpy, technical, powerful, compression, dyno, big moves, hips, ect') 
     into numerical parameters for generation.
@@ -65,7 +84,7 @@ def parse_style(style_input: str):
     if "big moves" in style_input or "reachy" in style_input:
         params["avg_move_distance"] = 0.9
 
-    return params
+    return StyleParams(**params)
 
 
 def parse_difficulty(diff_input: str) -> float:
@@ -83,34 +102,18 @@ def parse_difficulty(diff_input: str) -> float:
     # Remove words
     text = text.replace("SOFT", "").replace("HARD", "").strip()
 
-    # Detect V-scale
-    v_match = re.match(r"V(\d+)", text)
-    if v_match:
-        grade = "V" + v_match.group(1)
-        if grade in V_SCALE:
-            base = V_SCALE[grade]
-            if soft: base -= 0.03
-            if hard: base += 0.03
-            return max(0.0, min(1.0, base))
-
-    # Detect Fontainebleau
-    fb_grade = text
-    if fb_grade in FB_SCALE:
-        base = FB_SCALE[fb_grade]
+    # Single grade ("V4", "V04", "V4+", "6B+")
+    base = GRADE_SCALE.get(_normalize_grade(text))
+    if base is not None:
         if soft: base -= 0.03
         if hard: base += 0.03
         return max(0.0, min(1.0, base))
 
     # Grade ranges ("V3-V5", "6A-6C")
-    range_match = re.match(r"(.+)[\-–](.+)", text)
+    range_match = _RANGE_RE.match(text)
     if range_match:
-        g1, g2 = range_match.group(1).strip(), range_match.group(2).strip()
-        vals = []
-        for g in (g1, g2):
-            if g.startswith("V") and g in V_SCALE:
-                vals.append(V_SCALE[g])
-            elif g in FB_SCALE:
-                vals.append(FB_SCALE[g])
+        g1, g2 = (_normalize_grade(g.strip()) for g in range_match.groups())
+        vals = [GRADE_SCALE[g] for g in (g1, g2) if g in GRADE_SCALE]
         if vals:
             return sum(vals) / len(vals)
 
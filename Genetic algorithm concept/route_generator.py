@@ -1,237 +1,290 @@
-import random
-from typing import Dict, List, Tuple
-from route_representation import Route, Hold
-from parsing import parse_style, parse_difficulty
+import multiprocessing
+import os
+import numba
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+from route_representation import Route, HoldTable
+from parsing import StyleParams, parse_style, parse_difficulty
 
-def load_dummy_holds(cols=10, rows=10):
-    """Returns a dictionary of Hold objects arranged in a simple grid."""
-    holds = {}
-    hold_id = 0
-    for r in range(rows):
-        for c in range(cols):
-            holds[hold_id] = Hold(
-                id=hold_id,
-                x=c / (cols - 1),
-                y=r / (rows - 1),
-                hold_type="generic",
-                size=random.uniform(0.2, 0.8)
-            )
-            hold_id += 1
-    return holds
+try:
+    # Ahead-of-time build of ga_kernels (`python ga_kernels.py`), no JIT warm-up
+    from ga_kernels_aot import crossover_kernel, fitness_batch, random_walk
+except ImportError:
+    from ga_kernels import crossover_kernel, fitness_batch, random_walk
+
+def load_dummy_holds(cols=10, rows=10, rng=None):
+    """
+    Returns a HoldTable of holds arranged in a simple grid.
+    rng: optional np.random.Generator for the random hold sizes
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    xs, ys = np.meshgrid(np.linspace(0, 1, cols), np.linspace(0, 1, rows))
+    n = cols * rows
+    return HoldTable(
+        x=xs.ravel(),
+        y=ys.ravel(),
+        size=rng.uniform(0.2, 0.8, n),
+        hold_type=np.full(n, "generic")
+    )
+
+
+# Reachable move range (0.05 < dist < 0.3), squared so predicates skip the sqrt
+_MIN2, _MAX2 = 0.05**2, 0.3**2
+
+
+# Evolution settings copied onto each process pool worker's generator
+_SETTINGS = ('population_size', 'generations', 'mutation_rate', 'elite_size', 'patience')
+
+MUTATION_TYPES = ('replace', 'insert', 'remove', 'swap')
 
 
 class GeneticRouteGenerator:
-    def __init__(self, hold_dataset: Dict[int, Hold]):
+    def __init__(self, hold_dataset: HoldTable, seed=None):
+        """
+        seed: optional int or np.random.Generator, forwarded to default_rng
+        so that runs can be reproduced
+        """
         self.holds = hold_dataset
+        self.hold_x = hold_dataset.x
+        self.hold_y = hold_dataset.y
+        self.hold_size = hold_dataset.size
+        
+        # Hold positions never change, so pairwise distances and the
+        # reachable neighbors of every hold (0.05 < dist < 0.3) are built once.
+        # Neighbors are stored CSR-style: hold i's are
+        # neighbor_idx[neighbor_ptr[i]:neighbor_ptr[i + 1]]
+        dx = self.hold_x[:, None] - self.hold_x[None, :]
+        dy = self.hold_y[:, None] - self.hold_y[None, :]
+        d2 = dx * dx + dy * dy
+        reachable = (d2 > _MIN2) & (d2 < _MAX2)
+        self.D = np.sqrt(d2)
+        self.neighbor_ptr = np.zeros(len(hold_dataset) + 1, dtype=np.int32)
+        np.cumsum(reachable.sum(axis=1), out=self.neighbor_ptr[1:])
+        self.neighbor_idx = np.nonzero(reachable)[1].astype(np.int32)
+        self.bottom_holds = np.flatnonzero(self.hold_y < 0.2)
+        
+        self._reseed(seed)
         self.population_size = 50
         self.generations = 100
         self.mutation_rate = 0.2
         self.elite_size = 5
+        self.patience = 15  # generations without improvement before stopping early
         
-    def generate_route(self, difficulty: float, style: Dict) -> Route:
+    def generate_route(self, difficulty: float, style: StyleParams) -> Route:
         """Generate a route using genetic algorithm."""
+        return self._to_route_object(self._evolve(difficulty, style))
+    
+    def generate_routes(self, specs: List[Tuple[float, StyleParams]]) -> List[Route]:
+        """
+        Generate one route per (difficulty, style) spec.
+        Runs are independent, so they are spread over a process pool; each
+        worker builds its own generator once instead of receiving the holds
+        with every task.
+        """
+        if not specs:
+            return []
+        n_workers = min(os.cpu_count() or 1, len(specs))
+        chunksize = max(1, len(specs) // (4 * n_workers))
+        settings = {name: getattr(self, name) for name in _SETTINGS}
+        # Spawned, not forked: forking after Numba's parallel fitness kernel has
+        # started its thread pool can deadlock the workers
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 mp_context=multiprocessing.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(self.holds, settings)) as pool:
+            # One seed per spec, so a seeded generator gives the same routes
+            # however the specs are spread over the workers
+            seeds = self.rng.integers(2**63, size=len(specs)).tolist()
+            tasks = [(seed, difficulty, style) for seed, (difficulty, style) in zip(seeds, specs)]
+            sequences = list(pool.map(_evolve_worker, tasks, chunksize=chunksize))
+        return [self._to_route_object(seq) for seq in sequences]
+    
+    def _reseed(self, seed):
+        """Reset the numpy generator and the kernels' xorshift state from it."""
+        self.rng = np.random.default_rng(seed)
+        self._rng_state = self.rng.integers(1, 2**63, size=1, dtype=np.uint64)
+
+    def _evolve(self, difficulty: float, style: StyleParams) -> List[int]:
+        """Run the evolution loop and return the best hold sequence."""
         target_moves = self._moves_from_difficulty(difficulty)
         
+        # Two padded (pop_size, max_len) arenas: each generation is bred from
+        # `population` into `spare` and then the two are swapped. Mutation can
+        # grow a route to at most target_moves + 3 holds
+        shape = (self.population_size, target_moves + 3)
+        population, spare = np.full(shape, -1, dtype=np.int32), np.full(shape, -1, dtype=np.int32)
+        lengths = np.empty(self.population_size, dtype=np.int32)
+        spare_lengths = np.empty(self.population_size, dtype=np.int32)
+        fitness = np.empty(self.population_size, dtype=np.float64)
+        in_child = np.zeros(len(self.holds), dtype=np.uint8)
+        coefs = self._fitness_coefs(style, difficulty)
+        
         # Initialize population
-        population = [self._create_random_route(target_moves) for _ in range(self.population_size)]
+        starts = self.rng.choice(self.bottom_holds, size=self.population_size)
+        for i, start in enumerate(starts):
+            lengths[i] = self._create_random_route(target_moves, start, population[i])
         
         best_route = None
         best_fitness = float('-inf')
+        last_best = float('-inf')
+        stale = 0
         
         # Evolution loop
         for generation in range(self.generations):
             # Evaluate fitness
-            fitness_scores = [(route, self._fitness(route, style, difficulty)) 
-                            for route in population]
-            fitness_scores.sort(key=lambda x: x[1], reverse=True)
+            self._evaluate(population, lengths, coefs, fitness)
+            
+            # Selection: keep elite (partial selection, no full sort)
+            elite_idx = np.argpartition(-fitness, self.elite_size - 1)[:self.elite_size]
+            np.take(population, elite_idx, axis=0, out=spare[:self.elite_size])
+            np.take(lengths, elite_idx, out=spare_lengths[:self.elite_size])
             
             # Track best
-            if fitness_scores[0][1] > best_fitness:
-                best_fitness = fitness_scores[0][1]
-                best_route = fitness_scores[0][0]
+            top = elite_idx[np.argmax(fitness[elite_idx])]
+            if fitness[top] > best_fitness:
+                best_fitness = fitness[top]
+                best_route = population[top, :lengths[top]].tolist()
             
-            # Selection: keep elite
-            new_population = [route for route, _ in fitness_scores[:self.elite_size]]
+            # Stop early once the best fitness has plateaued
+            if best_fitness - last_best < 1e-4:
+                stale += 1
+            else:
+                stale = 0
+                last_best = best_fitness
+            if stale >= self.patience:
+                break
             
-            # Breeding: create offspring
-            while len(new_population) < self.population_size:
-                parent1 = self._tournament_select(fitness_scores)
-                parent2 = self._tournament_select(fitness_scores)
-                child = self._crossover(parent1, parent2)
+            # Breeding: create offspring, drawing this generation's parents
+            # and mutation choices up front
+            n_children = self.population_size - self.elite_size
+            parents = self._tournament_select(fitness, 2 * n_children)
+            mut_probs = self.rng.random(n_children)
+            mut_types = self.rng.integers(0, len(MUTATION_TYPES), size=n_children)
+            for k in range(n_children):
+                p1, p2 = parents[2 * k], parents[2 * k + 1]
+                row = self.elite_size + k
+                spare_lengths[row] = self._crossover(population[p1, :lengths[p1]],
+                                                     population[p2, :lengths[p2]],
+                                                     spare[row], in_child)
                 
-                if random.random() < self.mutation_rate:
-                    child = self._mutate(child, target_moves)
-                
-                new_population.append(child)
+                if mut_probs[k] < self.mutation_rate:
+                    spare_lengths[row] = self._mutate(spare[row], spare_lengths[row], target_moves,
+                                                      MUTATION_TYPES[mut_types[k]])
             
-            population = new_population
+            population, spare = spare, population
+            lengths, spare_lengths = spare_lengths, lengths
         
-        # Convert best route to Route object
-        return self._to_route_object(best_route)
+        return best_route
     
-    def _create_random_route(self, num_moves: int) -> List[int]:
-        """Create a random valid route."""
-        # Start from bottom
-        bottom_holds = [h.id for h in self.holds.values() if h.y < 0.2]
-        start = random.choice(bottom_holds)
-        
-        route = [start]
-        current = start
-        
-        for _ in range(num_moves):
-            # Find holds above and nearby
-            candidates = []
-            current_hold = self.holds[current]
-            
-            for h in self.holds.values():
-                if h.id in route:
-                    continue
-                    
-                # Must be upward or slightly lateral
-                if h.y < current_hold.y - 0.05:
-                    continue
-                
-                dist = ((h.x - current_hold.x)**2 + (h.y - current_hold.y)**2)**0.5
-                if 0.05 < dist < 0.3:
-                    candidates.append(h.id)
-            
-            if not candidates:
-                break
-                
-            next_hold = random.choice(candidates)
-            route.append(next_hold)
-            current = next_hold
-        
-        return route
+    def _create_random_route(self, num_moves: int, start: int, out: np.ndarray) -> int:
+        """Write a random valid route from a bottom start hold into `out`, returns its length."""
+        visited = np.zeros(len(self.holds), dtype=np.uint8)
+        return random_walk(self.hold_y, self.neighbor_ptr, self.neighbor_idx, visited,
+                            start, num_moves, out, self._rng_state)
     
-    def _fitness(self, route: List[int], style: Dict, difficulty: float) -> float:
-        """Evaluate route quality."""
-        if len(route) < 3:
-            return -1000
-        
-        score = 0.0
-        
-        # 1. Upward progression
-        y_values = [self.holds[h].y for h in route]
-        upward_score = sum(y2 - y1 for y1, y2 in zip(y_values[:-1], y_values[1:]))
-        score += upward_score * 100
-        
-        # 2. Consistent move distances
-        distances = []
-        for h1, h2 in zip(route[:-1], route[1:]):
-            hold1, hold2 = self.holds[h1], self.holds[h2]
-            dist = ((hold1.x - hold2.x)**2 + (hold1.y - hold2.y)**2)**0.5
-            distances.append(dist)
-        
-        if distances:
-            avg_dist = sum(distances) / len(distances)
-            target_dist = 0.1 + style["avg_move_distance"] * 0.1
-            dist_variance = sum((d - target_dist)**2 for d in distances) / len(distances)
-            score -= dist_variance * 500  # Penalize inconsistency
-        
-        # 3. Style matching - hold sizes
-        hold_sizes = [self.holds[h].size for h in route]
-        avg_size = sum(hold_sizes) / len(hold_sizes)
-        
-        if style["crimpy_level"] > 0.7:
-            score += (0.5 - avg_size) * 50  # Reward smaller holds
-        elif style["hold_size_preference"] > 0.7:
-            score += (avg_size - 0.5) * 50  # Reward larger holds
-        
-        # 4. Route length matching difficulty
+    def _fitness_coefs(self, style: StyleParams, difficulty: float) -> Tuple[float, ...]:
+        """
+        Fold the style/difficulty dependent parts of the fitness into scalars.
+        Style is fixed for a run, so its branches are taken once here instead
+        of for every individual in every generation.
+        """
+        target_dist = 0.1 + style.avg_move_distance * 0.1
         target_length = 4 + difficulty * 6
-        length_penalty = abs(len(route) - target_length) * 10
-        score -= length_penalty
         
-        # 5. No backtracking
-        y_decreases = sum(1 for y1, y2 in zip(y_values[:-1], y_values[1:]) if y2 < y1)
-        score -= y_decreases * 20
+        if style.crimpy_level > 0.7:
+            size_coef = -50.0  # Reward smaller holds
+        elif style.hold_size_preference > 0.7:
+            size_coef = 50.0  # Reward larger holds
+        else:
+            size_coef = 0.0
+        size_bias = -0.5 * size_coef  # score += (avg_size - 0.5) * size_coef
+        long_bonus = 10.0 if style.dynamic_level > 0.7 else 0.0
         
-        # 6. Dynamic movement bonus
-        if style["dynamic_level"] > 0.7:
-            long_moves = sum(1 for d in distances if d > 0.15)
-            score += long_moves * 10
-        
-        return score
+        return target_dist, size_coef, size_bias, long_bonus, target_length
+    
+    def _evaluate(self, population: np.ndarray, lengths: np.ndarray,
+                  coefs: Tuple[float, ...], out: np.ndarray) -> np.ndarray:
+        """Evaluate route quality for a whole padded population at once."""
+        fitness_batch(population, lengths, self.hold_y, self.hold_size, self.D, *coefs, out)
+        return out
     
-    def _tournament_select(self, fitness_scores: List[Tuple[List[int], float]], 
-                          tournament_size: int = 5) -> List[int]:
-        """Select parent using tournament selection."""
-        tournament = random.sample(fitness_scores, min(tournament_size, len(fitness_scores)))
-        return max(tournament, key=lambda x: x[1])[0]
+    def _tournament_select(self, fitness: np.ndarray, num_parents: int,
+                          tournament_size: int = 5) -> np.ndarray:
+        """Select parent indices using tournament selection, one tournament per row."""
+        tournaments = self.rng.integers(0, len(fitness), (num_parents, tournament_size))
+        winners = fitness[tournaments].argmax(axis=1)
+        return tournaments[np.arange(num_parents), winners]
     
-    def _crossover(self, parent1: List[int], parent2: List[int]) -> List[int]:
-        """Create child by combining two parents."""
+    def _crossover(self, parent1: np.ndarray, parent2: np.ndarray, child: np.ndarray,
+                   in_child: np.ndarray) -> int:
+        """Write a child combining two parents into the `child` row, returns its length."""
         if len(parent1) < 2 or len(parent2) < 2:
-            return parent1[:]
+            child[:len(parent1)] = parent1
+            child[len(parent1):] = -1
+            return len(parent1)
         
         # Single-point crossover
-        point = random.randint(1, min(len(parent1), len(parent2)) - 1)
-        
-        child = parent1[:point]
-        
-        # Add holds from parent2 that aren't already in child
-        for hold in parent2:
-            if hold not in child:
-                child.append(hold)
-                if len(child) >= max(len(parent1), len(parent2)):
-                    break
-        
-        return child
+        point = self.rng.integers(1, min(len(parent1), len(parent2)))
+        return crossover_kernel(parent1, parent2, point, child, in_child)
     
-    def _mutate(self, route: List[int], target_moves: int) -> List[int]:
-        """Randomly modify route."""
-        route = route[:]
+    def _mutate(self, route: np.ndarray, length: int, target_moves: int, mutation_type: str) -> int:
+        """Modify a padded route row in place with one of MUTATION_TYPES, returns its new length."""
+        # Holds already in the route
+        visited = np.zeros(len(self.holds), dtype=bool)
+        visited[route[:length]] = True
         
-        mutation_type = random.choice(['replace', 'insert', 'remove', 'swap'])
-        
-        if mutation_type == 'replace' and len(route) > 2:
+        if mutation_type == 'replace' and length > 2:
             # Replace a random hold
-            idx = random.randint(1, len(route) - 1)
-            prev_hold = self.holds[route[idx - 1]]
+            idx = self.rng.integers(1, length)
+            prev_hold = route[idx - 1]
             
-            candidates = [h.id for h in self.holds.values() 
-                         if h.id not in route and 
-                         h.y >= prev_hold.y - 0.05 and
-                         ((h.x - prev_hold.x)**2 + (h.y - prev_hold.y)**2)**0.5 < 0.3]
+            candidates = np.flatnonzero(~visited &
+                                        (self.hold_y >= self.hold_y[prev_hold] - 0.05) &
+                                        (self.D[prev_hold] < 0.3))
             
-            if candidates:
-                route[idx] = random.choice(candidates)
+            if len(candidates):
+                route[idx] = self.rng.choice(candidates)
         
-        elif mutation_type == 'insert' and len(route) < target_moves + 3:
+        elif mutation_type == 'insert' and length < target_moves + 3:
             # Insert a new hold
-            idx = random.randint(1, len(route) - 1)
-            prev_hold = self.holds[route[idx - 1]]
-            next_hold = self.holds[route[idx]]
+            idx = self.rng.integers(1, length)
+            prev_hold, next_hold = route[idx - 1], route[idx]
             
             # Find holds between prev and next
-            mid_x = (prev_hold.x + next_hold.x) / 2
-            mid_y = (prev_hold.y + next_hold.y) / 2
+            mid_x = (self.hold_x[prev_hold] + self.hold_x[next_hold]) / 2
+            mid_y = (self.hold_y[prev_hold] + self.hold_y[next_hold]) / 2
             
-            candidates = [h.id for h in self.holds.values() 
-                         if h.id not in route and
-                         abs(h.x - mid_x) < 0.15 and abs(h.y - mid_y) < 0.15]
+            candidates = np.flatnonzero(~visited &
+                                        (np.abs(self.hold_x - mid_x) < 0.15) &
+                                        (np.abs(self.hold_y - mid_y) < 0.15))
             
-            if candidates:
-                route.insert(idx, random.choice(candidates))
+            if len(candidates):
+                route[idx + 1:length + 1] = route[idx:length]
+                route[idx] = self.rng.choice(candidates)
+                length += 1
         
-        elif mutation_type == 'remove' and len(route) > 3:
+        elif mutation_type == 'remove' and length > 3:
             # Remove a random hold
-            idx = random.randint(1, len(route) - 2)
-            route.pop(idx)
+            idx = self.rng.integers(1, length - 1)
+            route[idx:length - 1] = route[idx + 1:length]
+            route[length - 1] = -1
+            length -= 1
         
-        elif mutation_type == 'swap' and len(route) > 3:
+        elif mutation_type == 'swap' and length > 3:
             # Swap two adjacent holds
-            idx = random.randint(1, len(route) - 2)
+            idx = self.rng.integers(1, length - 1)
             route[idx], route[idx + 1] = route[idx + 1], route[idx]
         
-        return route
+        return length
     
     def _moves_from_difficulty(self, diff: float) -> int:
         return int(4 + diff * 30)
     
     def _to_route_object(self, hold_sequence: List[int]) -> Route:
-        """Convert hold sequence to Route object."""
+        """Convert hold sequence (table rows) to Route object (hold ids)."""
+        hold_sequence = self.holds.ids[hold_sequence].tolist()
         start_holds = hold_sequence[:2] if len(hold_sequence) >= 2 else hold_sequence
         top_hold = hold_sequence[-1] if hold_sequence else None
         
@@ -244,6 +297,26 @@ class GeneticRouteGenerator:
         return route
 
 
+# PROCESS POOL WORKERS
+_worker_generator = None
+
+
+def _init_worker(hold_dataset: HoldTable, settings: dict):
+    global _worker_generator
+    # The pool already uses every core; a parallel fitness kernel per worker
+    # would only oversubscribe them
+    numba.set_num_threads(1)
+    _worker_generator = GeneticRouteGenerator(hold_dataset)
+    for name, value in settings.items():
+        setattr(_worker_generator, name, value)
+
+
+def _evolve_worker(task: Tuple[int, float, StyleParams]) -> List[int]:
+    seed, difficulty, style = task
+    _worker_generator._reseed(seed)
+    return _worker_generator._evolve(difficulty, style)
+
+
 # TESTING
 if __name__ == "__main__":
     hold_dataset = load_dummy_holds(cols=10, rows=10)
@@ -1,8 +1,10 @@
+import warnings
+import numpy as np
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Tuple
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Hold:
     id: int
     x: float       # board coordinate
@@ -11,22 +13,127 @@ class Hold:
     size: float    # optional (0 = tiny, 1 = huge)
 
 
-@dataclass
+class HoldTable:
+    """
+    Structure-of-arrays view of a hold dataset.
+    Row i of every column describes the hold with id ids[i], so the
+    generators can do their distance / filter math on whole columns at once.
+    Ids don't need to be contiguous: the generators work in rows, and
+    rows() / __getitem__ translate hold ids at the API boundary.
+    Hold objects are only built on demand.
+    """
+
+    def __init__(self, x, y, size, hold_type, ids=None):
+        self.x = np.ascontiguousarray(x, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float32)
+        self.size = np.ascontiguousarray(size, dtype=np.float32)
+        self.hold_type = np.asarray(hold_type)
+        if ids is None:
+            ids = np.arange(len(self.x))
+        self.ids = np.ascontiguousarray(ids, dtype=np.int32)
+        if len(self.ids) and self.ids.min() < 0:
+            raise ValueError("hold ids must be non-negative")
+
+        # id -> row lookup, -1 where no hold has that id
+        self._row_of = np.full(self.ids.max() + 1 if len(self.ids) else 0, -1, dtype=np.int32)
+        self._row_of[self.ids] = np.arange(len(self.ids), dtype=np.int32)
+        if np.count_nonzero(self._row_of >= 0) != len(self.ids):
+            raise ValueError("hold ids must be unique")
+
+    @classmethod
+    def from_holds(cls, holds: Dict[int, Hold]) -> "HoldTable":
+        ordered = [holds[i] for i in sorted(holds)]
+        return cls(
+            x=[h.x for h in ordered],
+            y=[h.y for h in ordered],
+            size=[h.size for h in ordered],
+            hold_type=[h.hold_type for h in ordered],
+            ids=[h.id for h in ordered]
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, hold_id: int) -> bool:
+        return 0 <= hold_id < len(self._row_of) and self._row_of[hold_id] >= 0
+
+    def __getitem__(self, hold_id: int) -> Hold:
+        if hold_id not in self:
+            raise KeyError(hold_id)
+        return self._hold_at(self._row_of[hold_id])
+
+    def rows(self, hold_ids) -> np.ndarray:
+        """Map an array of hold ids to their row indices."""
+        hold_ids = np.asarray(hold_ids, dtype=np.int64)
+        if len(hold_ids) and (hold_ids.min() < 0 or hold_ids.max() >= len(self._row_of)):
+            raise KeyError("unknown hold id")
+        rows = self._row_of[hold_ids]
+        if (rows < 0).any():
+            raise KeyError("unknown hold id")
+        return rows
+
+    # Dict[int, Hold]-style iteration, so the old dataset loops keep working
+    def __iter__(self):
+        return iter(self.ids.tolist())
+
+    def keys(self):
+        return self.ids.tolist()
+
+    def values(self):
+        return (self._hold_at(i) for i in range(len(self.ids)))
+
+    def items(self):
+        return ((int(hold_id), self._hold_at(i)) for i, hold_id in enumerate(self.ids))
+
+    def _hold_at(self, row: int) -> Hold:
+        return Hold(
+            id=int(self.ids[row]),
+            x=float(self.x[row]),
+            y=float(self.y[row]),
+            hold_type=str(self.hold_type[row]),
+            size=float(self.size[row])
+        )
+
+
+@dataclass(slots=True, eq=False)
 class Route:
-    holds: List[int]                       # list of hold IDs
+    holds: np.ndarray                      # int32 array of hold IDs
     start_holds: List[int] = field(default_factory=list)
     top_hold: Optional[int] = None
     metadata: Dict = field(default_factory=dict)
 
     # populated after linking holds to dataset
-    hold_objects: Dict[int, Hold] = field(default_factory=dict)
+    hold_objects: Optional[HoldTable] = None
+
+    def __setattr__(self, name, value):
+        # Keep holds an int32 array however it is assigned, not just in __init__
+        if name == "holds":
+            value = np.asarray(value, dtype=np.int32)
+        object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        # Written out because the generated __eq__ can't compare ndarray holds
+        if not isinstance(other, Route):
+            return NotImplemented
+        return (np.array_equal(self.holds, other.holds)
+                and self.start_holds == other.start_holds
+                and self.top_hold == other.top_hold
+                and self.metadata == other.metadata
+                and self.hold_objects is other.hold_objects)
 
     def add_hold(self, hold_id: int):
-        self.holds.append(hold_id)
+        self.holds = np.append(self.holds, np.int32(hold_id))
+
+    def remove_at(self, idx: int):
+        self.holds = np.delete(self.holds, idx)
 
     def remove_hold(self, hold_id: int):
-        if hold_id in self.holds:
-            self.holds.remove(hold_id)
+        """Deprecated: searches the route for hold_id, use remove_at instead."""
+        warnings.warn("Route.remove_hold is deprecated, use Route.remove_at",
+                      DeprecationWarning, stacklevel=2)
+        matches = np.flatnonzero(self.holds == hold_id)
+        if len(matches):
+            self.remove_at(matches[0])
 
     def set_start(self, hold_ids: List[int]):
         self.start_holds = hold_ids
@@ -38,14 +145,10 @@ class Route:
     # COMPUTED PROPERTIES
     def total_move_distance(self) -> float:
         """Sum of distances between consecutive holds."""
-        if not self.hold_objects or len(self.holds) < 2:
+        if self.hold_objects is None or len(self.holds) < 2:
             return 0.0
 
-        dist = 0.0
-        for h1, h2 in zip(self.holds[:-1], self.holds[1:]):
-            dist += self._euclidean_distance(self.hold_objects[h1], self.hold_objects[h2])
-
-        return dist
+        return float(self._move_distances().sum())
 
     def avg_move_distance(self) -> float:
         if len(self.holds) < 2:
@@ -54,21 +157,26 @@ class Route:
 
     def avg_hold_size(self) -> float:
         """Average hold size based on dataset."""
-        if not self.hold_objects:
+        if self.hold_objects is None or not len(self.holds):
             return 0.0
 
-        sizes = [self.hold_objects[h].size for h in self.holds if h in self.hold_objects]
-        if not sizes:
+        # Ids missing from the linked table are skipped, not an error
+        known = self.holds[np.isin(self.holds, self.hold_objects.ids)]
+        if not len(known):
             return 0.0
-        return sum(sizes) / len(sizes)
+        return float(self.hold_objects.size.take(self.hold_objects.rows(known)).mean())
 
-    def _euclidean_distance(self, h1: Hold, h2: Hold) -> float:
-        return ((h1.x - h2.x)**2 + (h1.y - h2.y)**2) ** 0.5
+    def _move_distances(self) -> np.ndarray:
+        """Euclidean length of every move, gathered from the hold table."""
+        rows = self.hold_objects.rows(self.holds)
+        xs = self.hold_objects.x.take(rows)
+        ys = self.hold_objects.y.take(rows)
+        return np.hypot(np.diff(xs), np.diff(ys))
 
     # Nice helper for debugging
     def summary(self) -> Dict:
         return {
-            "holds": self.holds,
+            "holds": self.holds.tolist(),
             "start": self.start_holds,
             "top": self.top_hold,
             "avg_move_dist": round(self.avg_move_distance(), 2),
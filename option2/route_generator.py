@@ -1,44 +1,49 @@
 import random
-from typing import Dict, List
-from route_representation import Route, Hold
-from parsing import parse_style, parse_difficulty
+import numpy as np
+from typing import List
+from route_representation import Route, Hold, HoldTable
+from parsing import StyleParams, parse_style, parse_difficulty
 from route_representation import Hold
 
+try:
+    # Ahead-of-time build of route_kernels (`python route_kernels.py`), no JIT warm-up
+    from route_kernels_aot import pick_next_hold
+except ImportError:
+    from route_kernels import pick_next_hold
+
 def load_dummy_holds(cols=10, rows=10):
     """
-    Returns a dictionary of Hold objects arranged in a simple grid.
+    Returns a HoldTable of holds arranged in a simple grid.
     Coordinates are normalized 0.0 → 1.0.
     Good for quick visualization and prototyping.
     """
-    holds = {}
-    hold_id = 0
-
-    for r in range(rows):
-        for c in range(cols):
-            x = c / (cols - 1)      # 0.0 → 1.0 horizontally
-            y = r / (rows - 1)      # 0.0 → 1.0 vertically
+    xs, ys = np.meshgrid(
+        np.linspace(0, 1, cols),    # 0.0 → 1.0 horizontally
+        np.linspace(0, 1, rows)     # 0.0 → 1.0 vertically
+    )
+    n = cols * rows
 
-            holds[hold_id] = Hold(
-                id=hold_id,
-                x=x,
-                y=y,
-                hold_type="generic",
-                size=0.5
-            )
-            hold_id += 1
-
-    return holds
+    return HoldTable(
+        x=xs.ravel(),
+        y=ys.ravel(),
+        size=np.full(n, 0.5),
+        hold_type=np.full(n, "generic")
+    )
 
 
 class RouteGenerator:
-    def __init__(self, hold_dataset: Dict[int, Hold]):
+    def __init__(self, hold_dataset: HoldTable):
         self.holds = hold_dataset
+        self.hold_x = hold_dataset.x
+        self.hold_y = hold_dataset.y
+        self.hold_size = hold_dataset.size
+        self._rng_state = np.array([random.getrandbits(64) | 1], dtype=np.uint64)
         
     # CREATE A NEW RANDOM ROUTE
-    def generate_route(self, difficulty: float, style: Dict) -> Route:
+    def generate_route(self, difficulty: float, style: StyleParams) -> Route:
         """
         difficulty: float 
-        style: dict from style_parser
+        style: StyleParams from parse_style
         """
 
         num_moves = self._moves_from_difficulty(difficulty)
@@ -51,20 +56,30 @@ class RouteGenerator:
 
         current_hold = random.choice(start)
 
+        # Holds already in the route
+        visited = np.zeros(len(self.holds), dtype=np.uint8)
+        visited[start] = 1
+
+        # Keep track of a reasonable top hold (highest y) as the route grows
+        top = max(start, key=lambda h: self.hold_y[h])
+        top_y = self.hold_y[top]
+
         for _ in range(num_moves):
-            next_hold = self._sample_next_hold(current_hold, style, hold_sequence)
+            next_hold = self._sample_next_hold(current_hold, style, visited)
             if next_hold is None:
                 break
-            hold_sequence.append(next_hold.id)
-            current_hold = next_hold.id
-
-        # Pick a reasonable top hold (highest y)
-        top = self._choose_top_hold(hold_sequence)
-
+            hold_sequence.append(next_hold)
+            visited[next_hold] = 1
+            current_hold = next_hold
+            if self.hold_y[next_hold] > top_y:
+                top_y, top = self.hold_y[next_hold], next_hold
+
+        # The generator works in table rows; the route holds dataset ids
+        ids = self.holds.ids
         route = Route(
-            holds=hold_sequence,
-            start_holds=start,
-            top_hold=top
+            holds=ids[hold_sequence],
+            start_holds=ids[start].tolist(),
+            top_hold=int(ids[top])
         )
 
         route.hold_objects = self.holds
@@ -81,77 +96,22 @@ class RouteGenerator:
 
     def _sample_start_holds(self) -> List[int]:
         """Choose 2 holds from the bottom 15% of the board."""
-        bottom = [h for h in self.holds.values() if h.y < 0.15]
-        start = random.sample(bottom, 2)
-        return [start[0].id, start[1].id]
+        bottom = np.flatnonzero(self.hold_y < 0.15)
+        start = random.sample(list(bottom), 2)
+        return [int(start[0]), int(start[1])]
 
-    def _sample_next_hold(self, current: int, style: Dict, existing_sequence: List[int]):
+    def _sample_next_hold(self, current: int, style: StyleParams, visited: np.ndarray):
         """Pick a hold in the style-preferred distance range with upward bias."""
 
-        current_hold = self.holds[current]
-
         # Movement distance preferences (smaller target distances)
-        base_dist = 0.08 + style["avg_move_distance"] * 0.15  # Range: 0.08 to 0.23
-        
-        candidates = []
-        for hold in self.holds.values():
-            # Skip holds already in the route
-            if hold.id in existing_sequence:
-                continue
-
-            # Bias hold size selection
-            if style["crimpy_level"] > 0.7 and hold.size > 0.6:
-                continue  # avoid big holds on crimpy problems
-            if style["hold_size_preference"] > 0.7 and hold.size < 0.3:
-                continue  # avoid small holds on juggy climbs
-
-            # Calculate distance
-            dist = ((hold.x - current_hold.x)**2 + (hold.y - current_hold.y)**2)**0.5
-            
-            # Upward progression: prioritize holds that are higher (lower y is higher on inverted board)
-            y_diff = hold.y - current_hold.y
-            
-            # Must be moving upward or slightly lateral (allow small downward for traverses)
-            if y_diff < -0.05:  # moving down too much
-                continue
-            
-            # Distance filtering - tighter range
-            min_dist = base_dist * 0.5
-            max_dist = base_dist * 1.8
-            
-            if min_dist < dist < max_dist:
-                # Score based on distance to target and upward movement
-                dist_score = abs(dist - base_dist)
-                upward_bonus = max(0, y_diff) * 2.0  # reward upward movement
-                
-                # Prefer moves that are upward and at good distance
-                score = dist_score - upward_bonus
-                candidates.append((score, dist, hold))
-
-        if not candidates:
-            # Fallback: just find any hold that's upward and reasonably close
-            for hold in self.holds.values():
-                if hold.id in existing_sequence:
-                    continue
-                y_diff = hold.y - current_hold.y
-                dist = ((hold.x - current_hold.x)**2 + (hold.y - current_hold.y)**2)**0.5
-                if y_diff >= 0 and dist < 0.3:
-                    candidates.append((dist, dist, hold))
-        
-        if not candidates:
-            return None
+        base_dist = 0.08 + style.avg_move_distance * 0.15  # Range: 0.08 to 0.23
 
-        # Sort by score (lower is better)
-        candidates.sort(key=lambda x: x[0])
-        
-        # Pick from top candidates with some randomness
-        top_n = min(5, len(candidates))
-        selected = random.choice(candidates[:top_n])
-        return selected[2]
-
-    def _choose_top_hold(self, sequence: List[int]) -> int:
-        """Pick the hold in the sequence with the highest Y coordinate."""
-        return max(sequence, key=lambda h: self.holds[h].y)
+        next_hold = pick_next_hold(self.hold_x, self.hold_y, self.hold_size, visited,
+                                   current, base_dist, style.crimpy_level,
+                                   style.hold_size_preference, self._rng_state)
+        if next_hold < 0:
+            return None
+        return int(next_hold)
 
 ## TESTING
 # Dummy hold dataset (you will replace with real Kilter holds)
@@ -0,0 +1,114 @@
+"""
+Numba kernels for the greedy route generator.
+
+Importing this module JIT-compiles the kernels on first call (cached on
+disk afterwards). Running `python route_kernels.py` builds the same kernels
+ahead of time into the `route_kernels_aot` extension, which route_generator
+prefers when it is importable.
+"""
+import numpy as np
+from numba import njit
+
+
+# Fallback reach limit, squared so kernels can skip the sqrt
+_MAX2 = 0.3**2
+
+
+@njit(cache=True)
+def _xorshift(rng_state):
+    """Advance a xorshift64 state in place and return the new value."""
+    x = rng_state[0]
+    x ^= x << np.uint64(13)
+    x ^= x >> np.uint64(7)
+    x ^= x << np.uint64(17)
+    rng_state[0] = x
+    return x
+
+
+@njit(cache=True)
+def _randbelow(rng_state, n):
+    return np.int64(_xorshift(rng_state) % np.uint64(n))
+
+
+@njit(cache=True)
+def _push_top(top_ids, top_scores, n_top, hold, score):
+    """Insert a candidate into the ascending top-k buffers, returns the new fill."""
+    score = np.float32(score)
+    if n_top == top_ids.shape[0]:
+        if score >= top_scores[n_top - 1]:
+            return n_top
+        n_top -= 1
+
+    # Ties keep the earlier hold first, like a stable sort would
+    k = n_top
+    while k > 0 and top_scores[k - 1] > score:
+        top_ids[k] = top_ids[k - 1]
+        top_scores[k] = top_scores[k - 1]
+        k -= 1
+    top_ids[k] = hold
+    top_scores[k] = score
+    return n_top + 1
+
+
+@njit(cache=True, fastmath=True)
+def pick_next_hold(hold_x, hold_y, hold_size, visited, current,
+                   base_dist, crimpy, big, rng_state):
+    """Pick the next hold id from the 5 best-scored candidates, -1 if none."""
+    # Filtering and scoring happen in one pass; only the 5 best candidates
+    # are kept instead of materialising and sorting every candidate
+    top_ids = np.empty(5, dtype=np.int32)
+    top_scores = np.empty(5, dtype=np.float32)
+    n_top = 0
+
+    # Distance filtering - tighter range, compared squared
+    min2 = (base_dist * 0.5)**2
+    max2 = (base_dist * 1.8)**2
+
+    for i in range(hold_x.shape[0]):
+        # Skip holds already in the route
+        if visited[i]:
+            continue
+
+        # Bias hold size selection
+        if crimpy > 0.7 and hold_size[i] > 0.6:
+            continue  # avoid big holds on crimpy problems
+        if big > 0.7 and hold_size[i] < 0.3:
+            continue  # avoid small holds on juggy climbs
+
+        # Must be moving upward or slightly lateral (allow small downward for traverses)
+        dy = hold_y[i] - hold_y[current]
+        if dy < -0.05:
+            continue
+
+        dx = hold_x[i] - hold_x[current]
+        d2 = dx * dx + dy * dy
+        if min2 < d2 < max2:
+            # Score based on distance to target and upward movement
+            score = abs(np.sqrt(d2) - base_dist) - max(dy, 0.0) * 2.0
+            n_top = _push_top(top_ids, top_scores, n_top, i, score)
+
+    if n_top == 0:
+        # Fallback: just find any hold that's upward and reasonably close
+        for i in range(hold_x.shape[0]):
+            if visited[i]:
+                continue
+            dx = hold_x[i] - hold_x[current]
+            dy = hold_y[i] - hold_y[current]
+            d2 = dx * dx + dy * dy
+            if dy >= 0 and d2 < _MAX2:
+                n_top = _push_top(top_ids, top_scores, n_top, i, np.sqrt(d2))
+
+    if n_top == 0:
+        return -1
+
+    # Pick from top candidates with some randomness
+    return top_ids[_randbelow(rng_state, n_top)]
+
+
+if __name__ == "__main__":
+    # Build-time only dependency, see the module docstring
+    from numba.pycc import CC
+
+    cc = CC("route_kernels_aot")
+    cc.export("pick_next_hold", "i8(f4[:], f4[:], f4[:], u1[:], i8, f8, f8, f8, u8[:])")(pick_next_hold)
+    cc.compile()
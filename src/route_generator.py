@@ -1,4 +1,5 @@
 import random
+from math import hypot
 from typing import Dict, List
 from route_representation import Route, Hold
 from parsing import parse_style, parse_difficulty
@@ -51,15 +52,18 @@ class RouteGenerator:
 
         current_hold = random.choice(start)
 
+        # Keep track of a reasonable top hold (highest y) as the route grows
+        top = max(start, key=lambda h: self.holds[h].y)
+        top_y = self.holds[top].y
+
         for _ in range(num_moves):
             next_hold = self._sample_next_hold(current_hold, style)
             if next_hold is None:
                 break
             hold_sequence.append(next_hold.id)
             current_hold = next_hold.id
-
-        # Pick a reasonable top hold (highest y)
-        top = self._choose_top_hold(hold_sequence)
+            if next_hold.y > top_y:
+                top_y, top = next_hold.y, next_hold.id
 
         route = Route(
             holds=hold_sequence,
@@ -103,7 +107,7 @@ class RouteGenerator:
                 continue  # avoid small holds on juggy climbs
 
             # spatial filtering
-            dist = ((hold.x - current_hold.x)**2 + (hold.y - current_hold.y)**2)**0.5
+            dist = hypot(hold.x - current_hold.x, hold.y - current_hold.y)
             if 0.3 < dist < target_dist * 1.4:
                 candidates.append((dist, hold))
 
@@ -114,10 +118,6 @@ class RouteGenerator:
         candidates.sort(key=lambda x: abs(x[0] - target_dist))
         return candidates[0][1]
 
-    def _choose_top_hold(self, sequence: List[int]) -> int:
-        """Pick the hold in the sequence with the highest Y coordinate."""
-        return max(sequence, key=lambda h: self.holds[h].y)
-
 ## TESTING
 # Dummy hold dataset (you will replace with real Kilter holds)
 dataset = {
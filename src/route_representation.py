@@ -1,8 +1,10 @@
+import warnings
 from dataclasses import dataclass, field
+from math import hypot
 from typing import List, Optional, Dict, Tuple
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Hold:
     id: int
     x: float       # board coordinate
@@ -11,7 +13,7 @@ class Hold:
     size: float    # optional (0 = tiny, 1 = huge)
 
 
-@dataclass
+@dataclass(slots=True)
 class Route:
     holds: List[int]                       # list of hold IDs
     start_holds: List[int] = field(default_factory=list)
@@ -24,9 +26,15 @@ class Route:
     def add_hold(self, hold_id: int):
         self.holds.append(hold_id)
 
+    def remove_at(self, idx: int):
+        self.holds.pop(idx)
+
     def remove_hold(self, hold_id: int):
+        """Deprecated: searches the route for hold_id, use remove_at instead."""
+        warnings.warn("Route.remove_hold is deprecated, use Route.remove_at",
+                      DeprecationWarning, stacklevel=2)
         if hold_id in self.holds:
-            self.holds.remove(hold_id)
+            self.remove_at(self.holds.index(hold_id))
 
     def set_start(self, hold_ids: List[int]):
         self.start_holds = hold_ids
@@ -63,7 +71,7 @@ class Route:
         return sum(sizes) / len(sizes)
 
     def _euclidean_distance(self, h1: Hold, h2: Hold) -> float:
-        return ((h1.x - h2.x)**2 + (h1.y - h2.y)**2) ** 0.5
+        return hypot(h1.x - h2.x, h1.y - h2.y)
 
     # Nice helper for debugging
     def summary(self) -> Dict: